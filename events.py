@@ -7,16 +7,14 @@ def press_event(x, y, game):
     :param game: Tic-Tac-Toe Game object.
     """
     if game.winner is None:
-        if game.turn is game.opponent:
+        if game.turn == game.opponent:
             game.ai_place_marker()
 
-        elif game.turn is game.player:
+        elif game.turn == game.player:
             square_index, square_center = game.clicked_square(x, y)
             if square_index:
                 game.place_marker(square_index)
 
-        game.clicked_square(x, y)
-
     else:
         game.clicked_button(x, y)
 
@@ -0,0 +1,78 @@
+#include <stdint.h>
+
+/* Same bitboard layout as game_ai.py, where square (row, col) is bit 3*row + col. */
+#define FULL_BOARD 0x1FF
+#define PLAYER_X 1
+#define PLAYER_O 2
+#define WIN 1
+#define STALE 0
+
+static const uint32_t WIN_MASKS[8] = {
+    0700, 0070, 0007,  /* left-right rows, in octal */
+    0444, 0222, 0111,  /* top-down rows */
+    0421, 0124         /* diagonal rows */
+};
+
+/* Center and corners first, so alpha-beta prunes earlier. */
+static const int MOVE_ORDER[9] = {4, 0, 2, 6, 8, 1, 3, 5, 7};
+
+static int has_won(uint32_t mask)
+{
+    for (int i = 0; i < 8; i++) {
+        if ((mask & WIN_MASKS[i]) == WIN_MASKS[i])
+            return 1;
+    }
+    return 0;
+}
+
+/* Negamax search with alpha-beta pruning, scored from the view of 'side'. */
+static int negamax(uint32_t x_mask, uint32_t o_mask, int side, int alpha, int beta, int *best_move_out)
+{
+    uint32_t own = side == PLAYER_X ? x_mask : o_mask;
+    uint32_t other = side == PLAYER_X ? o_mask : x_mask;
+
+    /* Return correct reward if there's a winner. */
+    if (has_won(own))
+        return WIN;
+    if (has_won(other))
+        return -WIN;
+    if ((x_mask | o_mask) == FULL_BOARD)
+        return STALE;
+
+    int score = -WIN - 1;
+    int move = -1;
+
+    /* Try each available move */
+    for (int i = 0; i < 9; i++) {
+        uint32_t bit = 1u << MOVE_ORDER[i];
+        if ((x_mask | o_mask) & bit)
+            continue;
+
+        int move_score;
+        if (side == PLAYER_X)
+            move_score = -negamax(x_mask | bit, o_mask, PLAYER_O, -beta, -alpha, 0);
+        else
+            move_score = -negamax(x_mask, o_mask | bit, PLAYER_X, -beta, -alpha, 0);
+
+        if (move_score > score) {
+            score = move_score;
+            move = MOVE_ORDER[i];
+        }
+
+        /* Prune the remaining moves if the opponent will never allow this position. */
+        if (move_score > alpha)
+            alpha = move_score;
+        if (alpha >= beta)
+            break;
+    }
+
+    if (best_move_out)
+        *best_move_out = move;
+    return score;
+}
+
+int minimax_c(uint32_t x_mask, uint32_t o_mask, int side, int *best_move_out)
+{
+    *best_move_out = -1;
+    return negamax(x_mask, o_mask, side, -WIN, WIN, best_move_out);
+}
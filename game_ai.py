@@ -1,73 +1,338 @@
 import numpy as np
 
+try:
+    from _game_ai import ffi, lib  # compiled with 'python game_ai_build.py'
+except ImportError:
+    ffi = lib = None
 
-def minimax(board, player, check_win, **kwargs):
+
+# Zobrist keys for every (row, col, piece) on the board, used to hash board positions.
+ZOB = np.random.RandomState(0).randint(0, 2**63, size=(3, 3, 3), dtype=np.int64)
+
+# Transposition table flags, telling if a stored score is exact or only a bound.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Transposition table mapping (position hash, side to move) to (score, flag, depth).
+_TT = {}
+
+# Order in which squares are searched. Center and corners are usually the strongest moves,
+# and trying them first lets alpha-beta prune the weaker ones earlier.
+MOVE_ORDER = ((1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1))
+
+# Board constants
+EMPTY = 0
+STALE = 0
+WIN = 1
+PLAYER_X = 1
+PLAYER_O = 2
+
+# Bitboard constants, where square (row, col) of a board is bit 3*row + col of a mask.
+FULL_BOARD = 0x1FF
+MOVE_ORDER_BITS = tuple(3 * row + col for row, col in MOVE_ORDER)  # (4, 0, 2, 6, 8, 1, 3, 5, 7)
+WIN_MASKS = (0b111000000, 0b000111000, 0b000000111,  # left-right rows
+             0b100100100, 0b010010010, 0b001001001,  # top-down rows
+             0b100010001, 0b001010100)               # diagonal rows
+
+
+def zobrist_hash(board):
+    """ Returns the Zobrist hash of a board.
+
+    :param board: 3x3 numpy ndarray where 0 is empty, 1 is X, 2 is O.
+    :return: Hash of the board position.
+    :rtype: numpy.int64
+    """
+    key = np.int64(0)
+    for (i, j), piece in np.ndenumerate(board):
+        if piece:
+            key ^= ZOB[i, j, piece]
+    return key
+
+
+def clear_transposition_table():
+    """ Deletes all positions stored by minimax. """
+    _TT.clear()
+
+
+def square_mask(square_index):
+    """ Returns bitboard mask of a square.
+
+    :param square_index: Index (row, col) of the square.
+    :rtype: int
+    """
+    row, col = square_index
+    return 1 << (3 * row + col)
+
+
+def mask_square_index(mask):
+    """ Returns index of the square set in a single-bit bitboard mask.
+
+    :param mask: Bitboard mask with exactly one bit set.
+    :rtype: tuple (int, int)
+    """
+    return divmod(mask.bit_length() - 1, 3)
+
+
+def board_to_masks(board):
+    """ Packs a board into one bitboard mask per player.
+
+    :param board: 3x3 numpy ndarray where 0 is empty, 1 is X, 2 is O.
+    :return: Bitboard masks of X's and O's.
+    :rtype: int, int
+    """
+    x_mask, o_mask = 0, 0
+    for bit, piece in enumerate(board.flat):
+        if piece == PLAYER_X:
+            x_mask |= 1 << bit
+        elif piece == PLAYER_O:
+            o_mask |= 1 << bit
+    return x_mask, o_mask
+
+
+def masks_to_board(x_mask, o_mask):
+    """ Unpacks bitboard masks into a board.
+
+    :param x_mask: Bitboard mask of X's.
+    :param o_mask: Bitboard mask of O's.
+    :return: 3x3 numpy ndarray where 0 is empty, 1 is X, 2 is O.
+    :rtype: numpy.ndarray
+    """
+    board = np.zeros(9, dtype=np.int8)
+    for bit in range(9):
+        if x_mask >> bit & 1:
+            board[bit] = PLAYER_X
+        elif o_mask >> bit & 1:
+            board[bit] = PLAYER_O
+    return board.reshape((3, 3))
+
+
+def check_win_masks(x_mask, o_mask):
+    """ Checks all rows of a bitboard for the winning condition.
+
+    :param x_mask: Bitboard mask of X's.
+    :param o_mask: Bitboard mask of O's.
+    :return: None if unfinished, 0 if stale, 1 if X won, 2 if O won.
+    :rtype: None or int
+    """
+    if any((x_mask & m) == m for m in WIN_MASKS):
+        return PLAYER_X
+
+    if any((o_mask & m) == m for m in WIN_MASKS):
+        return PLAYER_O
+
+    # If there's no winner when board is full it's a stale
+    if x_mask | o_mask == FULL_BOARD:
+        return STALE
+
+    return None
+
+
+def minimax(board, player, check_win, alpha=float('-inf'), beta=float('inf'), last_move=None,
+            key=None, depth=None, killers=None):
     """ Minimax algorithm to get the optimal Tic-Tac-Toe move on any board setup.
 
     This recursive function uses the minimax algorithm to look over each possible move
     and minimize the possible loss for a worst case scenario. For a deeper understanding
     and examples see: 'Wikipedia <https://en.wikipedia.org/wiki/Minimax>'_.
 
-    :param board: 3x3 numpy ndarray where 0 is empty, 1 is X, 2 is O.
+    The search is written in negamax form with alpha-beta pruning, meaning that branches
+    which cannot affect the final decision are cut off. See: 'Wikipedia
+    <https://en.wikipedia.org/wiki/Alpha%E2%80%93beta_pruning>'_.
+
+    Scores of searched positions are stored in a transposition table so that positions
+    reached through different move orders are only searched once. Moves that caused a
+    cutoff are remembered per ply as 'killer moves' and tried first by their siblings.
+
+    :param board: 3x3 numpy ndarray, preferably of dtype int8, where 0 is empty, 1 is X, 2 is O.
+        The top-level call copies 'board' and makes and unmakes moves in the copy, so 'board'
+        is never modified and may be read-only.
     :param player: Determines player: 1 if X, 2 if O.
     :param check_win: Function that takes a 'board' and returns: 0 if stale, 1 if X won, 2 if O won.
-    :param kwargs: Used in the recursion to pass the last move made.
+    :param alpha: Lower bound of the score 'player' is already assured of.
+    :param beta: Upper bound of the score the opponent is already assured of.
+    :param last_move: Used in the recursion to pass the last move made, None in the top-level call.
+    :param key: Zobrist hash of 'board', computed if not passed.
+    :param depth: Number of empty squares on 'board', computed if not passed.
+    :param killers: Killer move of each ply, created empty in the top-level call.
     :return: 'score' and index of optimal Tic-Tac-Toe 'move' given a 3x3 board.
     :rtype: float, tuple (int, int)
     """
 
-    EMPTY = 0
-    STALE = 0
-    WIN = 1
-    PLAYER_X = 1
-    PLAYER_O = 2
-
-    assert isinstance(board, np.ndarray) and board.shape == (3,3), 'board must be a (3,3) numpy.ndarray'
-    assert player is PLAYER_X or PLAYER_O, 'player must be an int 1 (X) or 2 (O).'
+    assert isinstance(board, np.ndarray) and board.shape == (3,3) and np.issubdtype(board.dtype, np.integer), \
+        'board must be a (3,3) numpy.ndarray of integers, e.g. int8'
+    assert player in (PLAYER_X, PLAYER_O), 'player must be an int 1 (X) or 2 (O).'
 
     # Get the constant integer value of the opponent.
     opponent = PLAYER_X if player == PLAYER_O else PLAYER_O
 
+    if last_move is None:
+        board = board.copy()
+    if key is None:
+        key = zobrist_hash(board)
+    if depth is None:
+        depth = np.count_nonzero(board == EMPTY)
+    if killers is None:
+        killers = [None] * 10
+
+    # Use the stored score if this position has already been searched.
+    alpha_original = alpha
+    entry = _TT.get((key, player))
+    if entry is not None and last_move is not None:
+        tt_score, tt_flag, tt_depth = entry
+        if tt_depth >= depth:
+            if tt_flag == EXACT:
+                return tt_score
+            elif tt_flag == LOWER:
+                alpha = max(alpha, tt_score)
+            elif tt_flag == UPPER:
+                beta = min(beta, tt_score)
+
+            if alpha >= beta:
+                return tt_score
+
     # Return correct reward if there's a winner.
     winner = check_win(board)
     if winner == player:
-        board[kwargs['last_move']] = EMPTY
         return WIN
 
     elif winner == opponent:
-        board[kwargs['last_move']] = EMPTY
         return -WIN
 
     move = -1
     score = float('-inf')
 
-    # Get indices of available moves.
-    available_moves = np.where(board == EMPTY)
-    am_indices = list(zip(*available_moves))
-
-    # Try each move
-    for move_index in am_indices:
-        # Make copy of current board grid.
-        board_copy = board
+    # Try the killer move of this ply first, if it's available.
+    ply = 9 - depth
+    killer = killers[ply]
+    if killer is not None and board[killer] == EMPTY:
+        move_order = (killer, *(m for m in MOVE_ORDER if m != killer))
+    else:
+        move_order = MOVE_ORDER
 
-        # Make move on copy
-        board_copy[move_index] = player
+    # Try each available move
+    for move_index in move_order:
+        if board[move_index] != EMPTY:
+            continue
 
-        move_score = -minimax(board_copy, opponent, check_win, last_move=move_index)
+        # Make move, search it and unmake it.
+        board[move_index] = player
+        move_key = key ^ ZOB[move_index[0], move_index[1], player]
+        move_score = -minimax(board, opponent, check_win, -beta, -alpha, last_move=move_index,
+                              key=move_key, depth=depth - 1, killers=killers)
+        board[move_index] = EMPTY
 
         if move_score > score:
             score = move_score
             move = move_index
 
+        # Prune the remaining moves if the opponent will never allow this position.
+        alpha = max(alpha, move_score)
+        if alpha >= beta:
+            killers[ply] = move_index
+            break
+
     if move == -1:
-        board[kwargs['last_move']] = EMPTY
         return STALE
 
-    # If the keyword-argument is not found, it must be the last recursion and
-    # should therefore return the best move and its score.
-    try:
-        board[kwargs['last_move']] = EMPTY
-    except KeyError:
+    # Store score together with how it relates to the search window.
+    if score <= alpha_original:
+        flag = UPPER
+    elif score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    _TT[(key, player)] = (score, flag, depth)
+
+    # The top-level call has no last move and should therefore return
+    # the best move and its score.
+    if last_move is None:
         return score, move
 
-    return score
\ No newline at end of file
+    return score
+
+
+def minimax_compiled(board, player):
+    """ Compiled minimax algorithm to get the optimal Tic-Tac-Toe move on any board setup.
+
+    Runs the alpha-beta search of 'game_ai.c' on the bitboards of 'board', requiring
+    the '_game_ai' extension to be built with 'python game_ai_build.py'.
+
+    :param board: 3x3 numpy ndarray where 0 is empty, 1 is X, 2 is O.
+    :param player: Determines player: 1 if X, 2 if O.
+    :return: 'score' and index of optimal Tic-Tac-Toe 'move' given a 3x3 board, None if there is no move.
+    :rtype: int, tuple (int, int)
+    """
+    if lib is None:
+        raise ImportError("The '_game_ai' extension is not built, run 'python game_ai_build.py'.")
+
+    x_mask, o_mask = board_to_masks(board)
+    move = ffi.new('int *')
+    score = lib.minimax_c(x_mask, o_mask, player, move)
+
+    if move[0] == -1:
+        return score, None
+    return score, divmod(move[0], 3)
+
+
+# Optimal move of every reachable position, keyed by (x_mask, o_mask, side to move).
+_POLICY = {}
+
+
+def _build_policy():
+    """ Solves every position reachable from an empty board and stores its optimal move in '_POLICY'.
+
+    Every position is only solved once, which makes a full solve of the game's 5478
+    positions fast enough to do at import.
+    """
+    scores = {}
+
+    def solve(x_mask, o_mask, player):
+        key = (x_mask, o_mask, player)
+        if key in scores:
+            return scores[key]
+
+        winner = check_win_masks(x_mask, o_mask)
+        if winner == STALE:
+            score = STALE
+        elif winner is not None:  # the last move won, so 'player' lost
+            score = -WIN
+        else:
+            score = float('-inf')
+            move = 0
+
+            for square in MOVE_ORDER_BITS:
+                bit = 1 << square
+                if (x_mask | o_mask) & bit:
+                    continue
+
+                if player == PLAYER_X:
+                    move_score = -solve(x_mask | bit, o_mask, PLAYER_O)
+                else:
+                    move_score = -solve(x_mask, o_mask | bit, PLAYER_X)
+
+                if move_score > score:
+                    score = move_score
+                    move = bit
+
+            _POLICY[key] = mask_square_index(move)
+
+        scores[key] = score
+        return score
+
+    solve(0, 0, PLAYER_X)
+
+
+def best_move(x_mask, o_mask, player):
+    """ Looks up the optimal move of a position.
+
+    :param x_mask: Bitboard mask of X's.
+    :param o_mask: Bitboard mask of O's.
+    :param player: Player to move: 1 if X, 2 if O.
+    :return: Index of optimal Tic-Tac-Toe move.
+    :rtype: tuple (int, int)
+    """
+    return _POLICY[(x_mask, o_mask, player)]
+
+
+_build_policy()
@@ -0,0 +1,23 @@
+""" Builds the '_game_ai' C extension used by 'game_ai.minimax_compiled'.
+
+Run 'python game_ai_build.py' to compile it with cffi.
+"""
+import os
+import shutil
+
+from cffi import FFI
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CDEF = "int minimax_c(uint32_t x_mask, uint32_t o_mask, int side, int *best_move_out);"
+
+ffibuilder = FFI()
+ffibuilder.cdef(CDEF)
+ffibuilder.set_source('_game_ai', '#include <stdint.h>\n' + CDEF,
+                      sources=[os.path.join(HERE, 'game_ai.c')])
+
+
+if __name__ == "__main__":
+    # Build in 'build/' and copy the finished extension next to 'game_ai.py'.
+    extension = ffibuilder.compile(tmpdir=os.path.join(HERE, 'build'), verbose=True)
+    shutil.copy(extension, HERE)
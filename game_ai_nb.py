@@ -0,0 +1,87 @@
+from numba import njit
+
+from game_ai import STALE, WIN, PLAYER_X, PLAYER_O, WIN_MASKS, FULL_BOARD, MOVE_ORDER_BITS
+
+
+# Returned by 'check_win_nb' while the game is unfinished.
+UNFINISHED = -1
+
+
+@njit(cache=True)
+def check_win_nb(x_mask, o_mask):
+    """ Checks all rows of a bitboard for the winning condition.
+
+    :param x_mask: Bitboard mask of X's, where square (row, col) is bit 3*row + col.
+    :param o_mask: Bitboard mask of O's.
+    :return: -1 if unfinished, 0 if stale, 1 if X won, 2 if O won.
+    :rtype: int
+    """
+    for m in WIN_MASKS:
+        if (x_mask & m) == m:
+            return PLAYER_X
+        if (o_mask & m) == m:
+            return PLAYER_O
+
+    # If there's no winner when board is full it's a stale
+    if x_mask | o_mask == FULL_BOARD:
+        return STALE
+
+    return UNFINISHED
+
+
+@njit(cache=True)
+def minimax_nb(x_mask, o_mask, player, alpha, beta):
+    """ Compiled minimax algorithm to get the optimal Tic-Tac-Toe move on any board setup.
+
+    Same negamax search with alpha-beta pruning as 'game_ai.minimax', but compiled with
+    Numba and working on bitboards, meaning that a move is a single bit and the board
+    never has to be copied. Squares are tried in the order of 'game_ai.MOVE_ORDER'.
+
+    :param x_mask: Bitboard mask of X's, where square (row, col) is bit 3*row + col.
+    :param o_mask: Bitboard mask of O's.
+    :param player: Determines player: 1 if X, 2 if O.
+    :param alpha: Lower bound of the score 'player' is already assured of, -1 for a full search.
+    :param beta: Upper bound of the score the opponent is already assured of, 1 for a full search.
+    :return: 'score' and bitboard mask of the optimal move, 0 if there is no move.
+    :rtype: int, int
+    """
+    opponent = PLAYER_X if player == PLAYER_O else PLAYER_O
+
+    # Return correct reward if there's a winner.
+    winner = check_win_nb(x_mask, o_mask)
+    if winner == player:
+        return WIN, 0
+    elif winner == opponent:
+        return -WIN, 0
+    elif winner == STALE:
+        return STALE, 0
+
+    score = -WIN - 1
+    move = 0
+
+    # Try each available move
+    for square in MOVE_ORDER_BITS:
+        bit = 1 << square
+        if (x_mask | o_mask) & bit:
+            continue
+
+        if player == PLAYER_X:
+            move_score = -minimax_nb(x_mask | bit, o_mask, opponent, -beta, -alpha)[0]
+        else:
+            move_score = -minimax_nb(x_mask, o_mask | bit, opponent, -beta, -alpha)[0]
+
+        if move_score > score:
+            score = move_score
+            move = bit
+
+        # Prune the remaining moves if the opponent will never allow this position.
+        alpha = max(alpha, move_score)
+        if alpha >= beta:
+            return score, move
+
+    return score, move
+
+
+def warm_up():
+    """ Compiles (or loads from cache) the Numba functions by solving an empty board. """
+    minimax_nb(0, 0, PLAYER_X, -WIN, WIN)
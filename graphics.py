@@ -2,10 +2,37 @@ from my_vector import Vector  # custom 2d vector class
 
 import numpy as np
 import math
+import pyglet.font
+from pyglet.gl import GL_QUADS
+from pyglet.sprite import Sprite
 from pyglet.text import Label
 
 
+def glyph_atlas(characters, font_size, font_name='Arial'):
+    """ Gets images of single characters from the texture atlas pyglet renders font glyphs to.
+
+    Drawing such an image as a sprite avoids the text layout done by every pyglet Label.
+
+    :param characters: String of the characters to get images of.
+    :param font_size: Font size.
+    :param font_name: Font name.
+    :return: Images anchored at their center, keyed by character.
+    :rtype: dict
+    """
+    font = pyglet.font.load(font_name, font_size)
+
+    atlas = {}
+    for character, glyph in zip(characters, font.get_glyphs(characters)):
+        image = glyph.get_region(0, 0, glyph.width, glyph.height)
+        image.anchor_x = image.width // 2
+        image.anchor_y = image.height // 2
+        atlas[character] = image
+    return atlas
+
+
 class GraphicsObject:
+    __slots__ = ()
+
     graphics_objects = []
 
 
@@ -17,11 +44,17 @@ class Rectangle(GraphicsObject):
     :param pos: Rectangle center position as Vector.
     :param rotation: Rectangle rotation in radians.
     :param hidden: Does not get drawn in batch if True.
+    :param batch: pyglet batch the rectangle is drawn in, not drawn if None.
     """
+    __slots__ = ('width', 'height', 'pos', '_rotation', '_cos', '_sin', 'hidden', 'v0', 'v1', 'v2', 'v3', 'vlist')
+
     # Constants
     VTOT = 4  # total vertices
+    MODE = GL_QUADS
+    BATCH_GROUP = None
+    DRAW_FORMAT = 'v2f/dynamic'  # vertices are updated in place by 'set_vertices'
 
-    def __init__(self, width, height, pos=Vector(0,0), rotation=0, hidden=False):
+    def __init__(self, width, height, pos=Vector(0,0), rotation=0, hidden=False, batch=None):
         assert isinstance(pos, Vector), '\'pos\' must be a Vector object.'
 
         self.width = width
@@ -29,6 +62,7 @@ class Rectangle(GraphicsObject):
         self.pos = pos
         self.rotation = rotation
         self.hidden = hidden
+        self.vlist = None  # pyglet vertex list in batch
 
         # Setup all vertices as Vectors
         self.v0 = []  # bottom left
@@ -37,16 +71,43 @@ class Rectangle(GraphicsObject):
         self.v3 = []  # top left
         self.set_vertices()
 
+        # Vertex list is allocated once and then only gets its vertices updated.
+        if batch is not None and not hidden:
+            self.vlist = batch.add(self.VTOT, self.MODE, self.BATCH_GROUP, (self.DRAW_FORMAT, self.vertices_tuple()))
+
         # Add Rectangle object to graphics_objects in parent class.
         super().graphics_objects.append(self)
 
+    @property
+    def rotation(self):
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        """ Setter caches cosine and sine of the rotation for 'self.rotated_vertices'. """
+        self._rotation = value
+        self._cos = math.cos(value)
+        self._sin = math.sin(value)
+
     def set_vertices(self):
-        """ Sets vertices to correct values based on instance attributes. """
+        """ Sets vertices to correct values based on instance attributes and updates the batch. """
         if self.rotation == 0:
             self.v0, self.v1, self.v2, self.v3 = self.non_rotated_vertices()
         else:
             self.v0, self.v1, self.v2, self.v3 = self.rotated_vertices()
 
+        if self.vlist is not None:
+            self.vlist.vertices[:] = self.vertices_tuple()
+
+    def delete(self):
+        """ Removes the rectangle from its batch and from 'graphics_objects'. """
+        if self.vlist is not None:
+            self.vlist.delete()
+            self.vlist = None
+
+        if self in self.graphics_objects:
+            self.graphics_objects.remove(self)
+
     def non_rotated_vertices(self):
         """ Get vertices when the rectangle's rotation is 0.
 
@@ -64,12 +125,13 @@ class Rectangle(GraphicsObject):
         :return: Vertices as lists containing (x, y) coordinates.
         :rtype: list
         """
+        cos, sin = self._cos, self._sin
+        pos_x, pos_y = self.pos.x, self.pos.y
+
         rotated_vertices = []
-        for v in self.non_rotated_vertices():
-            x, y = v[0], v[1]
-            x_rotated = self.pos.x + (x-self.pos.x)*math.cos(self.rotation) - (y-self.pos.y)*math.sin(self.rotation)
-            y_rotated = self.pos.y + (x-self.pos.x)*math.sin(self.rotation) + (y-self.pos.y)*math.cos(self.rotation)
-            rotated_vertices.append([x_rotated, y_rotated])
+        for x, y in self.non_rotated_vertices():
+            dx, dy = x - pos_x, y - pos_y
+            rotated_vertices.append([pos_x + dx*cos - dy*sin, pos_y + dx*sin + dy*cos])
         return rotated_vertices
 
     def vertices_tuple(self):
@@ -88,10 +150,6 @@ class Rectangle(GraphicsObject):
         """
         return width/2, height/2
 
-    def batch_params(self):
-        """ Returns all parameters needed for a Pyglet batch. """
-        return self.VTOT, self.vertices_tuple()
-
     def inside_rectangle(self, x, y):
         """ Returns True if (x, y) is inside borders of rectangle.
 
@@ -108,12 +166,15 @@ class GridLine(Rectangle):
     """ Template for gridline part of Tic-Tac-Toe grid.
 
     :param horizontal: Makes horizontal gridline if True.
+    :param batch: pyglet batch the gridline is drawn in.
     """
-    def __init__(self, width=35, height=600, horizontal=False):
+    __slots__ = ()
+
+    def __init__(self, width=35, height=600, horizontal=False, batch=None):
         if horizontal:
             width, height = height, width
 
-        super().__init__(width, height)
+        super().__init__(width, height, batch=batch)
 
 
 class TicTacToeGrid:
@@ -122,11 +183,12 @@ class TicTacToeGrid:
     :param window_width: Width of window to render in
     :param window_height: Height of window to render in
     :param spacing: Space between center and middle of each GridLine
+    :param batch: pyglet batch the grid is drawn in.
     """
 
     GRID_SHAPE = (3, 3)
 
-    def __init__(self, window_width, window_height, spacing=100):
+    def __init__(self, window_width, window_height, spacing=100, batch=None):
         self.window_width = window_width
         self.window_height = window_height
         self.spacing = spacing
@@ -134,10 +196,10 @@ class TicTacToeGrid:
 
         # Setup grid lines and their positions with respect to the window size
         self.lines = {
-            'left_vertical_line': GridLine(),
-            'right_vertical_line': GridLine(),
-            'top_horizontal_line': GridLine(horizontal=True),
-            'bot_horizontal_line': GridLine(horizontal=True)
+            'left_vertical_line': GridLine(batch=batch),
+            'right_vertical_line': GridLine(batch=batch),
+            'top_horizontal_line': GridLine(horizontal=True, batch=batch),
+            'bot_horizontal_line': GridLine(horizontal=True, batch=batch)
         }
         self.setup_lines()
 
@@ -146,6 +208,7 @@ class TicTacToeGrid:
 
         # Center coordinates of each square from top left to bottom right.
         self.square_centers = self.get_square_centers()
+        self._centers = self.square_centers.tolist()  # plain floats for fast mouse hit tests
         self.square_width = 2 * self.spacing - self.lines['left_vertical_line'].width
         self.square_width_half = self.square_width / 2
 
@@ -195,14 +258,12 @@ class TicTacToeGrid:
         :rtype: tuple
 
         """
-        square_centers = self.get_square_centers()
-        for i, row in enumerate(square_centers):
+        half = self.square_width_half
+        for i, row in enumerate(self._centers):
             for j, (square_x, square_y) in enumerate(row):
 
-                if (square_x - self.square_width_half < x < square_x + self.square_width_half and
-                        square_y - self.square_width_half < y < square_y + self.square_width_half):
-
-                    return (i, j), (float(square_x), float(square_y))
+                if abs(x - square_x) < half and abs(y - square_y) < half:
+                    return (i, j), (square_x, square_y)
 
         return None, None
 
@@ -214,14 +275,17 @@ class TextLabel:
     :param text: Label text.
     :param font_size: Font size.
     :param font_name: Font name.
+    :param batch: pyglet batch the label is drawn in.
+    :param atlas: Images from 'glyph_atlas', the label is drawn as a sprite if 'text' is in it.
     """
+    __slots__ = ('pos', 'text', 'font_size', 'font_name', 'label_object')
 
     text_labels = []
 
     # pyglet Label parameters.
     ANCHOR_X, ANCHOR_Y = 'center', 'center'
 
-    def __init__(self, pos, text, font_size=40, font_name='Arial'):
+    def __init__(self, pos, text, font_size=40, font_name='Arial', batch=None, atlas=None):
         assert isinstance(pos, Vector), "pos must be a Vector object."
         assert isinstance(text, str), "text must be a string"
         self.pos = pos
@@ -229,29 +293,40 @@ class TextLabel:
         self.font_size = font_size
         self.font_name = font_name
 
+        # Created once, since layout of the text is expensive.
+        if atlas is not None and self.text in atlas:
+            self.label_object = Sprite(atlas[self.text], x=self.pos.x, y=self.pos.y, batch=batch)
+        else:
+            self.label_object = Label(self.text, font_name=self.font_name, font_size=self.font_size,
+                                      x=self.pos.x, y=self.pos.y, anchor_x=self.ANCHOR_X, anchor_y=self.ANCHOR_Y,
+                                      batch=batch)
+
         self.text_labels.append(self)
 
-    def batched_drawing(self, batch):
-        """ Draws label to passed pyglet batch.
-
-        :param batch: pyglet batch object.
-        """
-        Label(self.text, font_name=self.font_name, font_size=self.font_size,
-              x=self.pos.x, y=self.pos.y, anchor_x=self.ANCHOR_X, anchor_y=self.ANCHOR_Y,
-              batch=batch)
+    def delete(self):
+        """ Removes the label from its batch, does nothing if already removed. """
+        if self.label_object is not None:
+            self.label_object.delete()
+            self.label_object = None
 
     @classmethod
     def clear_all(cls):
         """ Deletes all TextLabel objects. """
+        for text_label in cls.text_labels:
+            text_label.delete()
         del cls.text_labels[:]
 
 
 class Marker(TextLabel):
     """ Marker object for Tic-Tac-Toe. """
+    __slots__ = ()
+
+    FONT_SIZE = 120
+
     markers = []
 
-    def __init__(self, pos, text, font_size=120):
-        super().__init__(pos, text, font_size=font_size)
+    def __init__(self, pos, text, font_size=FONT_SIZE, batch=None, atlas=None):
+        super().__init__(pos, text, font_size=font_size, batch=batch, atlas=atlas)
 
         self.markers.append(self)
 
@@ -260,6 +335,8 @@ class Marker(TextLabel):
         """ Deletes all Marker objects. """
         # Clear all markers from superclass list 'text_labels'.
         cls.text_labels[:] = [tl for tl in cls.text_labels if not isinstance(tl, Marker)]
+        for marker in cls.markers:
+            marker.delete()
         del cls.markers[:]
 
 
@@ -269,6 +346,8 @@ class Button:
     :param pos: Vector position of button.
     :param action: Function for button response.
     """
+    __slots__ = ('pos', 'action', 'pressed')
+
     buttons = []
 
     def __init__(self, pos, action):
@@ -283,9 +362,14 @@ class Button:
     def release(self):
         self.pressed = False
 
+    def delete(self):
+        """ Does nothing, subclasses release their drawables here. """
+
     @classmethod
     def clear_all(cls):
         """ Delete all button objects. """
+        for button in cls.buttons:
+            button.delete()
         del cls.buttons[:]
 
 
@@ -302,10 +386,13 @@ class RectangleButton(Button):
     :param text: Button text.
     :param font_size: Font size.
     :param font_name: Font name.
+    :param batch: pyglet batch the button is drawn in.
     """
+    __slots__ = ('width', 'height', 'text', 'font_size', 'font_name', 'label_object', 'rectangle_object')
+
     ANCHOR_X, ANCHOR_Y = 'center', 'center'
 
-    def __init__(self, pos, action, width=100, height=30, text="", font_size=30, font_name='Arial'):
+    def __init__(self, pos, action, width=100, height=30, text="", font_size=30, font_name='Arial', batch=None):
         super().__init__(pos, action)
         self.width = width
         self.height = height
@@ -313,20 +400,16 @@ class RectangleButton(Button):
         self.font_size = font_size
         self.font_name = font_name
         # self.hidden = False
-        self.label_object = None
-        self.rectangle_object = None
-
-        self.buttons.append(self)
-
-    def batched_drawing(self, batch):
-        """ Currently handles both batched drawing of pyglet label and the creation of the Rectangle. """
         self.label_object = Label(self.text, font_name=self.font_name, font_size=self.font_size,
                                   x=self.pos.x, y=self.pos.y, anchor_x=self.ANCHOR_X, anchor_y=self.ANCHOR_Y,
                                   batch=batch)
 
-        # Rectangle objects are added to the batch "automatically" since it's a subclass of GraphicsObject.
+        # Hidden Rectangle only used for interacting with the mouse.
         self.rectangle_object = Rectangle(self.width, self.height, pos=self.pos, hidden=True)
 
+        self.buttons.append(self)
 
-
-
+    def delete(self):
+        """ Removes the button label from its batch and its Rectangle from 'graphics_objects'. """
+        self.label_object.delete()
+        self.rectangle_object.delete()
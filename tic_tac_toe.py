@@ -1,22 +1,22 @@
 import numpy as np
+import pyglet
 
-from graphics import TicTacToeGrid, TextLabel, Marker, RectangleButton
-from game_ai import minimax
+from graphics import TicTacToeGrid, TextLabel, Marker, RectangleButton, glyph_atlas
+from game_ai import clear_transposition_table, check_win_masks, square_mask, board_to_masks, masks_to_board, best_move
+from game_ai import EMPTY, STALE, PLAYER_X, PLAYER_O
 from my_vector import Vector
 
 
 # Game constants
-STALE = 0
-PLAYER_X = 1
-PLAYER_O = 2
-
 PLAYER_SYMBOLS = ('EMPTY', 'X', 'O')
 
 
 class Board:
     """ Creates a 3x3 board for Tic-Tac-Toe.
 
-    Every board starts as an empty (3,3) numpy.ndarray where the values are:
+    The board is stored as two bitboards, one 9-bit mask per player, where square
+    (row, col) is bit 3*row + col. 'self.spaces' converts it to and from a (3,3)
+    numpy.ndarray of dtype int8 where the values are:
         - 0: Empty
         - 1: X
         - 2: O
@@ -30,33 +30,53 @@ class Board:
             - 2: O won
     """
     def __init__(self):
-        self._spaces = np.zeros(shape=(3, 3), dtype=int)
+        self._x_mask = 0
+        self._o_mask = 0
         self._winner = None
         self.winner_symbol = None
         self.turn = PLAYER_X
 
     def __getitem__(self, key):
-        return self._spaces[key]
+        bit = square_mask(key)
+        if self._x_mask & bit:
+            return PLAYER_X
+        if self._o_mask & bit:
+            return PLAYER_O
+        return EMPTY
 
     def __setitem__(self, key, value):
-        self._spaces[key] = value
+        bit = square_mask(key)
+        self._x_mask &= ~bit
+        self._o_mask &= ~bit
+        if value == PLAYER_X:
+            self._x_mask |= bit
+        elif value == PLAYER_O:
+            self._o_mask |= bit
         self.check_win()
 
     @property
     def spaces(self):
-        return self._spaces
+        """ Read-only copy of the board as a (3,3) numpy.ndarray of dtype int8.
+
+        Changing the copy can't change the board, set squares with 'self[index] = value'.
+        It can be passed straight to 'minimax', which searches on its own copy.
+        """
+        spaces = masks_to_board(self._x_mask, self._o_mask)
+        spaces.flags.writeable = False
+        return spaces
 
     @spaces.setter
     def spaces(self, value):
         """ Setter makes sure to correct 'self.winner' if 'self.spaces' is set. """
-        assert isinstance(value, np.ndarray) and value.shape == (3, 3), "spaces type must be a (3,3) numpy.ndarray"
+        assert isinstance(value, np.ndarray) and value.shape == (3, 3) and value.dtype == np.int8, \
+            "spaces type must be a (3,3) numpy.ndarray of dtype int8"
 
         ones_tot = np.count_nonzero(value == PLAYER_X)
         twos_tot = np.count_nonzero(value == PLAYER_O)
 
         assert ones_tot == twos_tot or ones_tot == twos_tot + 1, "X's must be == O's or O's + 1"
 
-        self._spaces = value
+        self._x_mask, self._o_mask = board_to_masks(value)
         self.check_win()
 
     @property
@@ -67,13 +87,13 @@ class Board:
     def winner(self, value):
         """ Setter makes sure to correct 'self.winner_symbol' if 'self.winner' is set. """
         self._winner = value
-        if self.winner is PLAYER_X:
+        if self.winner == PLAYER_X:
             self.winner_symbol = 'X'
 
-        elif self.winner is PLAYER_O:
+        elif self.winner == PLAYER_O:
             self.winner_symbol = 'O'
 
-        elif self.winner is STALE:
+        elif self.winner == STALE:
             self.winner_symbol = "STALE"
 
         else:
@@ -81,23 +101,11 @@ class Board:
 
     def reset(self):
         """ Resets board to initial state. """
-        self._spaces = np.zeros(shape=(3, 3), dtype=int)
+        self._x_mask = 0
+        self._o_mask = 0
         self.winner = None
         self.turn = PLAYER_X
 
-    def get_rows(self):
-        """ Gets all 'rows' that could contain 3 of the same marker in a row.
-
-        :return: All possible "rows" of length 3.
-        :rtype: list [numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
-        """
-        left_right_rows = self._spaces
-        top_down_rows = self._spaces.transpose()
-        diagonal_row = self._spaces.diagonal()
-        flipped_diagonal_row = np.flip(self._spaces, axis=1).diagonal()
-
-        return [*left_right_rows, *top_down_rows, diagonal_row, flipped_diagonal_row]
-
     def check_win(self):
         """ Checks all rows for winning condition and sets 'self.winner' accordingly.
 
@@ -106,61 +114,33 @@ class Board:
         if self.winner is not None:  # don't check win if already solved
             return
 
-        rows = self.get_rows()
-        for row in rows:
-            if all(row == PLAYER_X):  # check if X won
-                self.winner = PLAYER_X
-                return
-
-            if all(row == PLAYER_O):  # check if O won
-                self.winner = PLAYER_O
-                return
-
-        # If there's no winner when board is full it's a stale
-        if self._spaces.all():
-            self.winner = STALE
-
-    @staticmethod
-    def get_rows_grid(board_grid):
-        """ Gets all 'rows' that could contain 3 of the same marker in a row.
-
-        :param board_grid: (3, 3) numpy.ndarray
-        :return: All possible "rows" of length 3.
-        :rtype: list [numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray] """
-        left_right_rows = board_grid
-        top_down_rows = board_grid.transpose()
-        diagonal_row = board_grid.diagonal()
-        flipped_diagonal_row = np.flip(board_grid, axis=1).diagonal()
-
-        return [*left_right_rows, *top_down_rows, diagonal_row, flipped_diagonal_row]
+        self.winner = check_win_masks(self._x_mask, self._o_mask)
 
     @staticmethod
     def check_win_grid(board_grid):
         """ Checks all rows for winning condition and sets 'self.winner' accordingly.
 
+        The squares are read once into plain ints, so no arrays are created for the rows.
+
         :param board_grid: board_grid: (3, 3) numpy.ndarray
         :return: Winner of 'board_grid' setup.
         :rtype: None or int
         """
-        winner = None
-
-        rows = Board.get_rows_grid(board_grid)
-        for row in rows:
-            if all(row == PLAYER_X):  # check if X won
-                winner = PLAYER_X
-                return winner
+        (s00, s01, s02), (s10, s11, s12), (s20, s21, s22) = board_grid.tolist()
+        rows = ((s00, s01, s02), (s10, s11, s12), (s20, s21, s22),  # left-right rows
+                (s00, s10, s20), (s01, s11, s21), (s02, s12, s22),  # top-down rows
+                (s00, s11, s22), (s02, s11, s20))                   # diagonal rows
 
-            if all(row == PLAYER_O):  # check if O won
-                winner = PLAYER_O
-                return winner
+        for a, b, c in rows:
+            if a != EMPTY and a == b == c:  # check if X or O won
+                return a
 
         # If there's no winner when board is full it's a stale
-        if board_grid.all():
-            winner = STALE
-            return winner
+        if EMPTY not in (s00, s01, s02, s10, s11, s12, s20, s21, s22):
+            return STALE
 
         # If not finished, return None
-        return winner
+        return None
 
 
 class Game(Board):
@@ -168,7 +148,7 @@ class Game(Board):
 
     This object sets up a game of Tic-Tac-Toe between the user and an unbeatable AI using
     a minimax algorithm to play optimally. Graphics and rendering is handled by custom
-    classes and pyglet.
+    classes and pyglet, where everything is drawn from the single batch 'self.batch'.
 
     :param player_symbol: "X" or "O"
     :param window_width: Program window width.
@@ -179,12 +159,14 @@ class Game(Board):
     def __init__(self, player_symbol, window_width, window_height):
         assert player_symbol in self.PLAYERS, "Player must be 'X' or 'O'."
         self.player_symbol = player_symbol
-        self.player = PLAYER_X if self.player_symbol is 'X' else PLAYER_O
-        self.opponent = PLAYER_O if self.player_symbol is 'X' else PLAYER_X
+        self.player = PLAYER_X if self.player_symbol == 'X' else PLAYER_O
+        self.opponent = PLAYER_O if self.player_symbol == 'X' else PLAYER_X
 
         self.window_width = window_width
         self.window_height = window_height
-        self.grid = TicTacToeGrid(self.window_width, self.window_height)
+        self.batch = pyglet.graphics.Batch()
+        self.grid = TicTacToeGrid(self.window_width, self.window_height, batch=self.batch)
+        self.marker_atlas = glyph_atlas(''.join(self.PLAYERS), Marker.FONT_SIZE)
 
         self.buttons = {}
         self.button_params = {
@@ -208,21 +190,25 @@ class Game(Board):
 
     def end(self):
         """ Displays winner and "play again" button. """
-        winner_text = "{} WON".format(self.winner_symbol) if self.winner_symbol is not "STALE" else "STALE"
-        self.game_labels['winner_label'] = TextLabel(text=winner_text,
+        winner_text = "{} WON".format(self.winner_symbol) if self.winner_symbol != "STALE" else "STALE"
+        self.game_labels['winner_label'] = TextLabel(text=winner_text, batch=self.batch,
                                                      **self.game_label_params['winner_label'])
 
-        self.buttons['rematch_button'] = RectangleButton(**self.button_params['rematch_button'])
+        self.buttons['rematch_button'] = RectangleButton(batch=self.batch, **self.button_params['rematch_button'])
 
     def end_turn(self):
         """ Swaps 'self.turn' to other player. """
-        self.turn = PLAYER_O if self.turn is PLAYER_X else PLAYER_X
+        self.turn = PLAYER_O if self.turn == PLAYER_X else PLAYER_X
 
     def rematch(self):
         """ Resets board and clears makers and unnecessary labels. """
         self.reset()
+        Marker.clear_all_markers()
         TextLabel.clear_all()
         RectangleButton.clear_all()
+        self.game_labels.clear()
+        self.buttons.clear()
+        clear_transposition_table()
 
     def clicked_square(self, x, y):
         """ Get index of clicked square in Tic-Tac-Toe grid.
@@ -241,7 +227,7 @@ class Game(Board):
         :param x: Mouse x-coordinate
         :param y: Mouse y-coordinate
         """
-        for key, button in self.buttons.items():
+        for key, button in list(self.buttons.items()):  # copy, since an action can clear 'self.buttons'
             if button.rectangle_object.inside_rectangle(x, y):
 
                 if not button.pressed:
@@ -268,9 +254,9 @@ class Game(Board):
         symbol = PLAYER_SYMBOLS[self.turn]  # get string symbol current player.
 
         # If square is empty, set marker on board and draw it.
-        if not self.spaces[square_index]:
-            self.spaces[square_index] = self.turn
-            Marker(pos, symbol)
+        if not self[square_index]:
+            self[square_index] = self.turn
+            Marker(pos, symbol, batch=self.batch, atlas=self.marker_atlas)
 
             # Swap turn and check if board is finished.
             self.end_turn()
@@ -280,11 +266,11 @@ class Game(Board):
                 self.end()
 
     def ai_place_marker(self):
-        """ Places marker using minimax algorithm. """
+        """ Places marker using the minimax policy solved at import. """
         # Avoid placing marker if game is finished.
         if self.winner is not None:
             return
 
         # Get optimal move and place marker accordingly.
-        minimax_score, optimal_move = minimax(self.spaces, self.opponent, Board.check_win_grid)
+        optimal_move = best_move(self._x_mask, self._o_mask, self.opponent)
         self.place_marker(optimal_move)